@@ -9,23 +9,82 @@ import pyttsx3
 import speech_recognition as sr
 import sys
 import os
+import queue
 import re
+import threading
 import time
 from pathlib import Path
 
+# Optional: offline speech recognition (falls back to Google when missing)
+try:
+    import numpy as np
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# Text cleaning patterns (compiled once, reused for every utterance)
+_RE_CODEBLOCK = re.compile(r'```[\s\S]*?```')
+_RE_INLINE_CODE = re.compile(r'`[^`]+`')
+_RE_HEADER = re.compile(r'#{1,6}\s+')
+_RE_BOLD = re.compile(r'\*\*([^*]+)\*\*')
+_RE_ITALIC = re.compile(r'\*([^*]+)\*')
+_RE_URL = re.compile(r'https?://[^\s]+')
+
+# List markers only skip indentation on their own line (not blank lines
+# above), so runs of blank lines can't make the scan backtrack quadratically
+_RE_BULLET = re.compile(r'^[^\S\n]*[-*•]\s+', re.MULTILINE)
+_RE_NUMBERED = re.compile(r'^[^\S\n]*\d+\.\s+', re.MULTILINE)
+
+# Sentence boundaries for chunked reading
+_RE_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Emojis are a fixed set of codepoints, so str.translate drops them
+_EMOJIS = "🔥💰✅❌⚡🌟🚀🎯📊⏳🟡🟢🔴👽🌌💡🎉🤖🔊📢💬🎵🎶"
+_EMOJI_TABLE = dict.fromkeys(map(ord, _EMOJIS), None)
+
+# Anything the cleanup passes could change besides whitespace.
+# Only worth checking on short texts (spoken replies); on long file input
+# the check costs nearly as much as the cleanup it would skip.
+_FAST_PATH_MAX_CHARS = 1000
+_RE_NEEDS_CLEAN = re.compile(
+    r'[`*#•' + _EMOJIS + r']|https?://|^[^\S\n]*(?:-|\d+\.)\s',
+    re.MULTILINE
+)
+
+# TTS voices as (id, name, languages), queried from the engine once per process
+_VOICE_CACHE = None
+_VOICE_CACHE_LOCK = threading.Lock()
+
+
+def _get_voices(tts_engine):
+    """Return the cached voice list, populating it on first use"""
+    global _VOICE_CACHE
+    with _VOICE_CACHE_LOCK:
+        if _VOICE_CACHE is None:
+            _VOICE_CACHE = [(v.id, v.name, v.languages) for v in tts_engine.getProperty('voices')]
+        return _VOICE_CACHE
+
+
 class ConsciousnessVoice:
     """Voice interface for consciousness revolution"""
 
-    def __init__(self, rate=175, volume=1.0, voice_index=0, enable_analytics=True):
+    def __init__(self, rate=175, volume=1.0, voice_index=0, enable_analytics=True, local_asr=True):
         """Initialize voice system"""
         self.rate = rate
         self.volume = volume
         self.voice_index = voice_index
         self.tts_engine = None
         self.recognizer = sr.Recognizer()
+        self.recognizer.energy_threshold = 300
+        self.recognizer.dynamic_energy_threshold = True  # Adapts while listening, no per-call calibration
         self.microphone = None
+        self._mic_source = None
         self.analytics = None
 
+        # Local Whisper model, loaded on first listen
+        self._asr = None
+        self._use_local_asr = local_asr and WhisperModel is not None
+
         # Initialize analytics
         if enable_analytics:
             try:
@@ -37,9 +96,9 @@ class ConsciousnessVoice:
         # Initialize TTS
         try:
             self.tts_engine = pyttsx3.init()
-            voices = self.tts_engine.getProperty('voices')
+            voices = _get_voices(self.tts_engine)
             if voice_index < len(voices):
-                self.tts_engine.setProperty('voice', voices[voice_index].id)
+                self.tts_engine.setProperty('voice', voices[voice_index][0])
             self.tts_engine.setProperty('rate', rate)
             self.tts_engine.setProperty('volume', volume)
             print("✅ TTS initialized")
@@ -55,34 +114,35 @@ class ConsciousnessVoice:
 
     def clean_text_for_speech(self, text):
         """Remove markdown and special characters for better speech"""
+        # Plain short text only needs whitespace collapsed
+        if len(text) <= _FAST_PATH_MAX_CHARS and not _RE_NEEDS_CLEAN.search(text):
+            return ' '.join(text.split())
+
         # Remove code blocks
-        text = re.sub(r'```[\s\S]*?```', ' code block ', text)
+        text = _RE_CODEBLOCK.sub(' code block ', text)
 
         # Remove inline code
-        text = re.sub(r'`[^`]+`', ' code ', text)
+        text = _RE_INLINE_CODE.sub(' code ', text)
 
         # Remove markdown headers
-        text = re.sub(r'#{1,6}\s+', '', text)
+        text = _RE_HEADER.sub('', text)
 
         # Remove markdown bold/italic
-        text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-        text = re.sub(r'\*([^*]+)\*', r'\1', text)
+        text = _RE_BOLD.sub(r'\1', text)
+        text = _RE_ITALIC.sub(r'\1', text)
 
         # Remove bullets and numbers
-        text = re.sub(r'^\s*[-*•]\s+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+        text = _RE_BULLET.sub('', text)
+        text = _RE_NUMBERED.sub('', text)
 
         # Remove URLs
-        text = re.sub(r'https?://[^\s]+', ' link ', text)
+        text = _RE_URL.sub(' link ', text)
 
         # Remove emojis (basic)
-        text = re.sub(r'[🔥💰✅❌⚡🌟🚀🎯📊⏳🟡🟢🔴👽🌌💡🎉🤖🔊📢💬🎵🎶]', '', text)
-
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n', '\n', text)
-        text = re.sub(r'\s+', ' ', text)
+        text = text.translate(_EMOJI_TABLE)
 
-        return text.strip()
+        # Collapse whitespace
+        return ' '.join(text.split())
 
     def speak(self, text, interrupt=False):
         """
@@ -145,17 +205,17 @@ class ConsciousnessVoice:
             import time
             start_time = time.time()
 
-            with self.microphone as source:
-                print("🎤 Listening... (speak now)")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.listen(
-                    source,
-                    timeout=timeout,
-                    phrase_time_limit=phrase_time_limit
-                )
+            source = self._open_microphone()
+            self._discard_buffered_audio(source)
+            print("🎤 Listening... (speak now)")
+            audio = self.recognizer.listen(
+                source,
+                timeout=timeout,
+                phrase_time_limit=phrase_time_limit
+            )
 
             print("🧠 Processing speech...")
-            text = self.recognizer.recognize_google(audio)
+            text = self._transcribe(audio)
             duration = time.time() - start_time
 
             print(f"✅ You said: {text}")
@@ -186,6 +246,56 @@ class ConsciousnessVoice:
                 self.analytics.log_error("stt", str(e))
             return None
 
+    def _transcribe(self, audio):
+        """Transcribe audio with local Whisper if available, else Google"""
+        if self._use_local_asr:
+            try:
+                if self._asr is None:
+                    self._asr = WhisperModel("base.en", device="cpu", compute_type="int8")
+
+                # Whisper expects 16 kHz mono float32 in [-1, 1]
+                raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+                samples = np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+                segments, _ = self._asr.transcribe(samples, beam_size=1)
+                text = ''.join(segment.text for segment in segments).strip()
+            except Exception as e:
+                print(f"⚠️ Local speech recognition disabled: {e}")
+                self._use_local_asr = False
+            else:
+                if not text:
+                    raise sr.UnknownValueError()
+                return text
+
+        return self.recognizer.recognize_google(audio)
+
+    def _open_microphone(self):
+        """Open the microphone stream on first use and keep it open"""
+        if self._mic_source is None:
+            self._mic_source = self.microphone.__enter__()
+            # Calibrate once; later listens reuse the threshold
+            self.recognizer.adjust_for_ambient_noise(self._mic_source, duration=0.5)
+        return self._mic_source
+
+    def _discard_buffered_audio(self, source):
+        """Drop input buffered since the last listen (e.g. our own speech)"""
+        stream = source.stream.pyaudio_stream
+        available = stream.get_read_available()
+        if available:
+            stream.read(available, exception_on_overflow=False)
+
+    def shutdown(self):
+        """Close the microphone stream"""
+        if self._mic_source is not None:
+            self._mic_source = None
+            self.microphone.__exit__(None, None, None)
+
+    def __del__(self):
+        """Release the microphone if shutdown() was never called"""
+        try:
+            self.shutdown()
+        except Exception:
+            pass
+
     def conversation_mode(self, max_exchanges=10):
         """
         Interactive conversation mode
@@ -204,12 +314,13 @@ class ConsciousnessVoice:
                 continue
 
             # Check for exit
-            if 'exit' in command.lower() or 'quit' in command.lower():
+            command_lower = command.lower()
+            if 'exit' in command_lower or 'quit' in command_lower:
                 self.speak("Voice mode deactivated. Goodbye Commander!")
                 break
 
             # Process command (placeholder - integrate with consciousness system)
-            response = self.process_command(command)
+            response = self.process_command(command, _cl=command_lower)
             self.speak(response)
 
             exchanges += 1
@@ -217,38 +328,40 @@ class ConsciousnessVoice:
         if exchanges >= max_exchanges:
             self.speak(f"Max exchanges reached. Voice mode deactivating.")
 
-    def process_command(self, command):
+    def process_command(self, command, _cl=None):
         """
         Process voice command (integrate with consciousness system)
 
         Args:
             command: Recognized text
+            _cl: command.lower(), if the caller already computed it
 
         Returns:
             Response text
         """
-        command_lower = command.lower()
+        if _cl is None:
+            _cl = command.lower()
 
         # Status commands
-        if 'status' in command_lower:
+        if 'status' in _cl:
             return "Platform status: Fully operational. 5 human tasks remaining, revenue system live."
 
-        elif 'deploy' in command_lower:
+        elif 'deploy' in _cl:
             return "Deployment system ready. Use AUTO DEPLOY SYSTEM script."
 
-        elif 'payment' in command_lower or 'stripe' in command_lower:
+        elif 'payment' in _cl or 'stripe' in _cl:
             return "Stripe payment system is live and accepting real payments."
 
-        elif 'cloud' in command_lower or 'render' in command_lower:
+        elif 'cloud' in _cl or 'render' in _cl:
             return "Consciousness services running on Render dot com 24/7."
 
-        elif 'help' in command_lower:
+        elif 'help' in _cl:
             return "Available commands: status, deploy, payment, cloud, cockpit, services."
 
-        elif 'cockpit' in command_lower:
+        elif 'cockpit' in _cl:
             return "Commander Cockpit shows 5 human tasks, 9 missing APIs, 1.5 hours remaining."
 
-        elif 'services' in command_lower or 'trinity' in command_lower:
+        elif 'services' in _cl or 'trinity' in _cl:
             return "Trinity engines operational. C1 Mechanic, C2 Architect, C3 Oracle running."
 
         else:
@@ -265,6 +378,102 @@ class ConsciousnessVoice:
         except Exception as e:
             self.speak(f"Error reading file: {str(e)}")
 
+    def read_file_streaming(self, file_path, chunk_sents=4):
+        """
+        Read a file aloud chunk by chunk
+
+        A background thread reads and cleans the next group of sentences
+        while the TTS engine is still speaking the current one.
+
+        Args:
+            file_path: File to read
+            chunk_sents: Sentences per spoken chunk
+        """
+        if not self.tts_engine:
+            print("❌ TTS not available")
+            if self.analytics:
+                self.analytics.log_error("tts", "TTS engine not initialized")
+            return False
+
+        chunks = queue.Queue(maxsize=8)
+        stop = threading.Event()  # Set when the consumer is done, even on error
+
+        def put(item):
+            """Queue item for the consumer; False once it has stopped"""
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                sentences = []
+                pending = ''
+                fence = ''  # Lines of a fenced code block still being read
+                ticks = 0
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # Keep fenced code blocks whole, so no sentence split
+                        # lands inside one and clean_text never sees a lone ```
+                        if fence or '```' in line:
+                            fence += line
+                            ticks += line.count('```')
+                            if ticks % 2:
+                                continue
+                            line = _RE_CODEBLOCK.sub(' code block ', fence)
+                            fence = ''
+                            ticks = 0
+
+                        parts = _RE_SENTENCE_END.split(pending + line)
+                        pending = parts.pop()
+                        sentences.extend(parts)
+                        while len(sentences) >= chunk_sents:
+                            if not put(self.clean_text_for_speech('\n'.join(sentences[:chunk_sents]))):
+                                return
+                            del sentences[:chunk_sents]
+                sentences.append(pending + fence)
+                if not put(self.clean_text_for_speech('\n'.join(sentences))):
+                    return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not chunk:
+                    continue
+
+                print(f"🔊 Claude speaking: {len(chunk)} chars...")
+                start_time = time.time()
+                self.tts_engine.say(chunk)
+                self.tts_engine.runAndWait()
+                duration = time.time() - start_time
+
+                if self.analytics:
+                    self.analytics.log_tts(chunk, duration=duration, success=True)
+
+            print("✅ Done speaking")
+            return True
+
+        except FileNotFoundError:
+            self.speak(f"File not found: {file_path}")
+        except Exception as e:
+            self.speak(f"Error reading file: {str(e)}")
+        finally:
+            stop.set()
+        return False
+
     def list_voices(self):
         """List available TTS voices"""
         if not self.tts_engine:
@@ -272,12 +481,12 @@ class ConsciousnessVoice:
             return
 
         try:
-            voices = self.tts_engine.getProperty('voices')
+            voices = _get_voices(self.tts_engine)
             print(f"📢 Available Voices ({len(voices)}):")
-            for i, voice in enumerate(voices):
-                print(f"  [{i}] {voice.name}")
-                print(f"      ID: {voice.id}")
-                print(f"      Languages: {voice.languages}")
+            for i, (voice_id, name, languages) in enumerate(voices):
+                print(f"  [{i}] {name}")
+                print(f"      ID: {voice_id}")
+                print(f"      Languages: {languages}")
                 print()
         except Exception as e:
             print(f"❌ Error listing voices: {e}")
@@ -295,6 +504,7 @@ def main():
         print("  python CONSCIOUSNESS_VOICE_MODULE.py listen")
         print("  python CONSCIOUSNESS_VOICE_MODULE.py conversation")
         print("  python CONSCIOUSNESS_VOICE_MODULE.py read file.txt")
+        print("  python CONSCIOUSNESS_VOICE_MODULE.py stream file.txt")
         print("  python CONSCIOUSNESS_VOICE_MODULE.py voices")
         print()
         print("Options:")
@@ -346,6 +556,10 @@ def main():
         file_path = sys.argv[i + 1]
         voice.read_file(file_path)
 
+    elif command == "stream" and i + 1 < len(sys.argv):
+        file_path = sys.argv[i + 1]
+        voice.read_file_streaming(file_path)
+
     elif command == "voices":
         voice.list_voices()
 
@@ -353,6 +567,8 @@ def main():
         print(f"❌ Unknown command: {command}")
         sys.exit(1)
 
+    voice.shutdown()
+
 
 if __name__ == "__main__":
     main()
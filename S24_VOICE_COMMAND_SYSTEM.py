@@ -14,8 +14,11 @@ Trinity C3 Oracle Build - Nov 6, 2025
 """
 
 import subprocess
+import urllib.error
+import urllib.request
 import speech_recognition as sr
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -25,6 +28,7 @@ class S24VoiceCommander:
         self.recognizer = sr.Recognizer()
         self.commands_log = Path(r"C:\Users\dwrek\.consciousness\voice_commands.jsonl")
         self.commands_log.parent.mkdir(parents=True, exist_ok=True)
+        self._commands_log_fh = open(self.commands_log, 'a', buffering=1)
 
         print("=" * 80)
         print("🎤 S24 VOICE COMMAND SYSTEM")
@@ -71,12 +75,11 @@ class S24VoiceCommander:
         timestamp = datetime.now().isoformat()
 
         # Log command
-        with open(self.commands_log, 'a') as f:
-            f.write(json.dumps({
-                'timestamp': timestamp,
-                'command': command,
-                'status': 'executing'
-            }) + '\n')
+        self._commands_log_fh.write(json.dumps({
+            'timestamp': timestamp,
+            'command': command,
+            'status': 'executing'
+        }) + '\n')
 
         # Parse and execute
         if 'deploy trinity' in command or 'start trinity' in command:
@@ -128,28 +131,35 @@ class S24VoiceCommander:
             'Trinity Hub': 9999
         }
 
-        for service, port in services.items():
-            try:
-                result = subprocess.run(
-                    ['curl', f'http://localhost:{port}/health'],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                if result.returncode == 0:
-                    print(f"  ✅ {service}: Online")
-                else:
-                    print(f"  ❌ {service}: Offline")
-            except:
+        # Probe all services concurrently
+        with ThreadPoolExecutor(max_workers=len(services)) as pool:
+            online = list(pool.map(self._probe_service, services.values()))
+
+        for service, is_online in zip(services, online):
+            if is_online:
+                print(f"  ✅ {service}: Online")
+            else:
                 print(f"  ❌ {service}: Offline")
 
         # Check S24 connection
-        result = subprocess.run(['adb', 'devices'], capture_output=True, text=True)
-        if 'device\t' in result.stdout:
+        # Scan raw bytes; a connected device is listed as "<serial>\tdevice"
+        result = subprocess.run(['adb', 'devices'], capture_output=True)
+        if b'\tdevice' in result.stdout:
             print(f"  ✅ S24 Phone: Connected")
         else:
             print(f"  ❌ S24 Phone: Not connected")
 
+    def _probe_service(self, port):
+        """Return True if the service answers on its health endpoint"""
+        try:
+            urllib.request.urlopen(f'http://localhost:{port}/health', timeout=2).close()
+            return True
+        except urllib.error.HTTPError:
+            # Any HTTP response means the service is up
+            return True
+        except Exception:
+            return False
+
     def continuous_listening(self):
         """Listen for commands continuously"""
         print("\n🎤 Continuous voice command mode")
@@ -165,6 +175,10 @@ class S24VoiceCommander:
         except KeyboardInterrupt:
             print("\n\n✅ Voice commander stopped")
 
+    def close(self):
+        """Close the command log"""
+        self._commands_log_fh.close()
+
 # Example usage
 if __name__ == "__main__":
     commander = S24VoiceCommander()
@@ -183,3 +197,5 @@ if __name__ == "__main__":
         command = commander.listen_from_computer()
         if command:
             commander.execute_command(command)
+
+    commander.close()
@@ -5,14 +5,59 @@ Tracks all voice interactions, transcriptions, and system events
 Creates detailed logs for debugging and analytics
 """
 
+import atexit
 import json
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
 
+# Session report layout, filled in by VoiceAnalytics.generate_report
+_REPORT_TEMPLATE = """
+╔══════════════════════════════════════════════════════════════╗
+║           VOICE SESSION ANALYTICS REPORT                     ║
+╚══════════════════════════════════════════════════════════════╝
+
+Session ID: {session_id}
+Duration: {duration:.1f} seconds
+
+📊 EVENT STATISTICS:
+  • TTS Events: {tts_events}
+  • STT Events: {stt_events}
+  • Commands: {commands_processed}
+  • Errors: {errors}
+
+💬 TEXT STATISTICS:
+  • Characters Spoken (Claude): {total_chars_spoken:,}
+  • Characters Heard (Commander): {total_chars_heard:,}
+  • Total Characters: {total_chars:,}
+
+📈 PERFORMANCE:
+  • Events per minute: {events_per_minute:.1f}
+  • Success rate: {success_rate:.1f}%
+
+📁 FILES:
+  • Session log: {session_file}
+  • Event log: {events_file}
+  • Transcript: {transcript_file}
+
+╚══════════════════════════════════════════════════════════════╝
+"""
+
+
 class VoiceAnalytics:
     """Log and analyze all voice interactions"""
 
+    # Rewrite the session snapshot every N events (for crash recovery)
+    SNAPSHOT_INTERVAL = 50
+
+    # Max events waiting for the writer thread
+    QUEUE_SIZE = 1024
+
+    # Max events the writer drains and writes in one go
+    BATCH_SIZE = 32
+
     def __init__(self, log_dir="VOICE_LOGS"):
         """Initialize analytics logger"""
         self.log_dir = Path(log_dir)
@@ -22,41 +67,55 @@ class VoiceAnalytics:
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.session_file = self.log_dir / f"session_{self.session_id}.json"
         self.transcript_file = self.log_dir / f"transcript_{self.session_id}.txt"
+        self.events_file = self.log_dir / f"events_{self.session_id}.jsonl"
+
+        # Events are appended as JSON lines instead of rewriting the session file.
+        # Both logs are buffered and flushed after each batch the writer drains.
+        self._events_fh = open(self.events_file, 'a', encoding='utf-8', buffering=1 << 16)
+        self._transcript_fh = open(self.transcript_file, 'a', encoding='utf-8', buffering=1 << 16)
 
         # Session data
         self.session_data = {
             "session_id": self.session_id,
             "start_time": datetime.now().isoformat(),
-            "events": [],
+            "events_file": str(self.events_file),
             "statistics": {
+                "total_events": 0,
                 "tts_events": 0,
                 "stt_events": 0,
                 "commands_processed": 0,
                 "errors": 0,
                 "total_chars_spoken": 0,
                 "total_chars_heard": 0,
-                "avg_response_time": 0
+                "avg_response_time": 0,
+                "dropped_events": 0
             }
         }
 
         print(f"📊 Voice Analytics initialized")
         print(f"   Session ID: {self.session_id}")
         print(f"   Log file: {self.session_file}")
+        print(f"   Events: {self.events_file}")
         print(f"   Transcript: {self.transcript_file}")
 
-    def log_event(self, event_type, data):
-        """Log a voice event"""
-        timestamp = datetime.now().isoformat()
+        # Write the session file up front so short sessions still have one
+        self._save()
+
+        # Disk I/O runs on a writer thread so logging never blocks the voice loop
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._worker, daemon=True)
+        self._writer.start()
 
-        event = {
-            "timestamp": timestamp,
-            "type": event_type,
-            "data": data
-        }
+        # Save queued events even if close_session() is never called
+        self._closed = False
+        atexit.register(self._close_files)
 
-        self.session_data["events"].append(event)
+    def log_event(self, event_type, data, transcript=None):
+        """Log a voice event (and optionally a transcript line)"""
+        now = datetime.now()
 
         # Update statistics
+        self.session_data["statistics"]["total_events"] += 1
         if event_type == "tts":
             self.session_data["statistics"]["tts_events"] += 1
             self.session_data["statistics"]["total_chars_spoken"] += len(data.get("text", ""))
@@ -68,11 +127,64 @@ class VoiceAnalytics:
         elif event_type == "error":
             self.session_data["statistics"]["errors"] += 1
 
-        # Save immediately (for crash recovery)
-        self._save()
-
-        # Print to console
-        self._print_event(event_type, data)
+        # Hand off to the writer thread (never block the voice loop)
+        try:
+            self._queue.put_nowait((event_type, data, now, transcript))
+        except queue.Full:
+            self.session_data["statistics"]["dropped_events"] += 1
+
+    def _worker(self):
+        """Write queued events to disk in batches (runs on the writer thread)"""
+        written = 0
+        running = True
+        while running:
+            # Wait for one event, then take whatever else is already queued
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            event_lines = []
+            transcript_lines = []
+            for item in batch:
+                if item is None:
+                    running = False
+                    break
+
+                event_type, data, now, transcript = item
+                try:
+                    event = {
+                        "timestamp": now.isoformat(),
+                        "type": event_type,
+                        "data": data
+                    }
+                    event_lines.append(json.dumps(event, separators=(',', ':')) + '\n')
+
+                    # Print to console
+                    self._print_event(event_type, data, now)
+
+                    # Add to transcript
+                    if transcript:
+                        transcript_lines.append(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {transcript}")
+                except Exception as e:
+                    print(f"⚠️ Analytics write failed: {e}")
+
+            try:
+                self._events_fh.write(''.join(event_lines))
+                if transcript_lines:
+                    self._transcript_fh.write(''.join(transcript_lines))
+                self._events_fh.flush()
+                self._transcript_fh.flush()
+
+                # Snapshot periodically (for crash recovery)
+                previous = written
+                written += len(event_lines)
+                if written // self.SNAPSHOT_INTERVAL > previous // self.SNAPSHOT_INTERVAL:
+                    self._save()
+            except Exception as e:
+                print(f"⚠️ Analytics write failed: {e}")
 
     def log_tts(self, text, duration=None, success=True):
         """Log text-to-speech event"""
@@ -81,10 +193,7 @@ class VoiceAnalytics:
             "chars": len(text),
             "duration": duration,
             "success": success
-        })
-
-        # Add to transcript
-        self._append_transcript(f"[CLAUDE] {text}\n\n")
+        }, transcript=f"[CLAUDE] {text}\n\n")
 
     def log_stt(self, text, confidence=None, duration=None, success=True):
         """Log speech-to-text event"""
@@ -94,11 +203,7 @@ class VoiceAnalytics:
             "confidence": confidence,
             "duration": duration,
             "success": success
-        })
-
-        # Add to transcript
-        if text:
-            self._append_transcript(f"[COMMANDER] {text}\n\n")
+        }, transcript=f"[COMMANDER] {text}\n\n" if text else None)
 
     def log_command(self, command, response, processing_time=None):
         """Log command processing"""
@@ -123,9 +228,9 @@ class VoiceAnalytics:
             "details": details
         })
 
-    def _print_event(self, event_type, data):
+    def _print_event(self, event_type, data, now):
         """Print event to console"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = now.strftime("%H:%M:%S")
 
         if event_type == "tts":
             text = data.get("text", "")[:50] + "..." if len(data.get("text", "")) > 50 else data.get("text", "")
@@ -144,18 +249,17 @@ class VoiceAnalytics:
         elif event_type == "system":
             print(f"[{timestamp}] 🔧 SYS: {data.get('event')}")
 
-    def _append_transcript(self, text):
-        """Append to transcript file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.transcript_file, 'a', encoding='utf-8') as f:
-            f.write(f"[{timestamp}] {text}")
-
-    def _save(self):
-        """Save session data to file"""
+    def _save(self, final=False):
+        """Save session header and statistics to file (pretty-printed if final)"""
+        self._events_fh.flush()
+        self._transcript_fh.flush()
         self.session_data["last_updated"] = datetime.now().isoformat()
 
         with open(self.session_file, 'w', encoding='utf-8') as f:
-            json.dump(self.session_data, f, indent=2)
+            if final:
+                json.dump(self.session_data, f, indent=2)
+            else:
+                json.dump(self.session_data, f, separators=(',', ':'))
 
     def get_statistics(self):
         """Get session statistics"""
@@ -166,41 +270,42 @@ class VoiceAnalytics:
         stats = self.session_data["statistics"]
         duration = (datetime.now() - datetime.fromisoformat(self.session_data["start_time"])).total_seconds()
 
-        report = f"""
-╔══════════════════════════════════════════════════════════════╗
-║           VOICE SESSION ANALYTICS REPORT                     ║
-╚══════════════════════════════════════════════════════════════╝
-
-Session ID: {self.session_id}
-Duration: {duration:.1f} seconds
-
-📊 EVENT STATISTICS:
-  • TTS Events: {stats['tts_events']}
-  • STT Events: {stats['stt_events']}
-  • Commands: {stats['commands_processed']}
-  • Errors: {stats['errors']}
+        voice_events = stats['tts_events'] + stats['stt_events']
+
+        return _REPORT_TEMPLATE.format(
+            session_id=self.session_id,
+            duration=duration,
+            tts_events=stats['tts_events'],
+            stt_events=stats['stt_events'],
+            commands_processed=stats['commands_processed'],
+            errors=stats['errors'],
+            total_chars_spoken=stats['total_chars_spoken'],
+            total_chars_heard=stats['total_chars_heard'],
+            total_chars=stats['total_chars_spoken'] + stats['total_chars_heard'],
+            events_per_minute=stats['total_events'] / (duration / 60),
+            success_rate=(voice_events - stats['errors']) / max(voice_events, 1) * 100,
+            session_file=self.session_file,
+            events_file=self.events_file,
+            transcript_file=self.transcript_file
+        )
+
+    def _close_files(self):
+        """Drain the writer thread, save final data and close the logs (once)"""
+        if self._closed:
+            return
+        self._closed = True
+
+        self._queue.put(None)
+        self._writer.join()
 
-💬 TEXT STATISTICS:
-  • Characters Spoken (Claude): {stats['total_chars_spoken']:,}
-  • Characters Heard (Commander): {stats['total_chars_heard']:,}
-  • Total Characters: {stats['total_chars_spoken'] + stats['total_chars_heard']:,}
-
-📈 PERFORMANCE:
-  • Events per minute: {(len(self.session_data['events']) / (duration / 60)):.1f}
-  • Success rate: {((stats['tts_events'] + stats['stt_events'] - stats['errors']) / max(stats['tts_events'] + stats['stt_events'], 1) * 100):.1f}%
-
-📁 FILES:
-  • Session log: {self.session_file}
-  • Transcript: {self.transcript_file}
-
-╚══════════════════════════════════════════════════════════════╝
-"""
-        return report
+        self.session_data["end_time"] = datetime.now().isoformat()
+        self._save(final=True)
+        self._events_fh.close()
+        self._transcript_fh.close()
 
     def close_session(self):
         """Close session and save final data"""
-        self.session_data["end_time"] = datetime.now().isoformat()
-        self._save()
+        self._close_files()
 
         # Generate final report
         report = self.generate_report()
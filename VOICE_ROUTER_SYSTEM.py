@@ -11,13 +11,17 @@ All bots listen. Right ones respond. Can talk over each other.
 """
 
 import speech_recognition as sr
+import re
 import threading
 import queue
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from operator import itemgetter
+from VOICE_STREAMING_STT import create_streaming_recognizer, open_microphone
 
-# Voice input queue (all bots listen to this)
-voice_queue = queue.Queue()
+# Posted to a router's voice queue to stop its processor
+_SENTINEL = object()
 
 # Agent definitions with their keywords
 AGENTS = {
@@ -58,16 +62,54 @@ AGENTS = {
     }
 }
 
+# Keywords as sets, matched against the words of each message
+for config in AGENTS.values():
+    config['kw_set'] = frozenset(config['keywords'])
+
+_TOKEN_RE = re.compile(r'[a-z]+')
+
+# Agent reply templates ({} = what was said)
+RESPONSE_TEMPLATES = {
+    'Security Bot': "🔒 Security analysis: Checking '{}' for vulnerabilities...",
+    'System Bot': "💻 System command recognized. Processing '{}'...",
+    'C1 Mechanic': "🔧 Build request received. Planning '{}'...",
+    'C2 Architect': "🏗️  Architecture analysis for '{}'...",
+    'C3 Oracle': "🔮 Pattern recognition active. Analyzing '{}'...",
+    'Comms Bot': "📡 Communications request. Processing '{}'...",
+    'General Assistant': "💬 I heard '{}'. How can I help?"
+}
+
+# Bake each agent's color and the reset code into its template
+for agent_name, template in RESPONSE_TEMPLATES.items():
+    RESPONSE_TEMPLATES[agent_name] = AGENTS[agent_name]['color'] + template + '\033[0m'
+
 class VoiceRouter:
     def __init__(self):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # End phrases after 0.4 s of silence instead of the default 0.8 s
+        self.recognizer.pause_threshold = 0.4
+        self.recognizer.non_speaking_duration = 0.3
+        self.recognizer.phrase_threshold = 0.2
         self.running = True
 
+        # Voice input queue (all bots listen to this).
+        # One producer (listener) and one consumer (processor), so the lighter
+        # C-implemented SimpleQueue is enough.
+        self.voice_queue = queue.SimpleQueue()
+
+        # Stream audio to the recognizer while recording (None = record, then upload)
+        self.streaming = create_streaming_recognizer()
+
+        # Agent workers, reused for every message
+        self.pool = ThreadPoolExecutor(max_workers=max(4, len(AGENTS)), thread_name_prefix='agent')
+
         # Adjust for ambient noise
         print("🎙️  Calibrating microphone...")
-        with self.microphone as source:
+        self.microphone, source = open_microphone()
+        try:
             self.recognizer.adjust_for_ambient_noise(source, duration=2)
+        finally:
+            self.microphone.__exit__(None, None, None)
         print("✅ Ready to listen!\n")
 
     def listen_continuous(self):
@@ -76,16 +118,22 @@ class VoiceRouter:
             while self.running:
                 try:
                     print("👂 Listening...")
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=15)
+                    if self.streaming:
+                        audio = None
+                        # Opens a stream only once the room gets loud enough to be speech
+                        text = self.streaming.recognize(source, timeout=5, phrase_time_limit=15,
+                                                        energy_threshold=self.recognizer.energy_threshold)
+                    else:
+                        audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=15)
 
-                    # Transcribe
-                    text = self.recognizer.recognize_google(audio)
+                        # Transcribe
+                        text = self.recognizer.recognize_google(audio)
                     timestamp = datetime.now().strftime("%H:%M:%S")
 
                     print(f"\n🎤 [{timestamp}] You said: \"{text}\"\n")
 
                     # Put in queue for all agents to process
-                    voice_queue.put({
+                    self.voice_queue.put({
                         'text': text,
                         'timestamp': timestamp,
                         'audio': audio
@@ -103,81 +151,78 @@ class VoiceRouter:
 
     def route_to_agents(self, message):
         """Determine which agents should respond"""
-        text = message['text'].lower()
-        responding_agents = []
-
-        # Check each agent's keywords
-        for agent_name, config in AGENTS.items():
-            for keyword in config['keywords']:
-                if keyword in text:
-                    responding_agents.append({
-                        'name': agent_name,
-                        'priority': config['priority'],
-                        'color': config['color']
-                    })
-                    break  # Found a match, don't check other keywords
+        # Tokenize once, then match whole words by set intersection
+        tokens = set(_TOKEN_RE.findall(message['text'].lower()))
 
-        # Sort by priority (highest first)
-        responding_agents.sort(key=lambda x: x['priority'], reverse=True)
+        # Agents as (priority, name, color)
+        responding_agents = [
+            (config['priority'], agent_name, config['color'])
+            for agent_name, config in AGENTS.items()
+            if not config['kw_set'].isdisjoint(tokens)
+        ]
+
+        # Sort by priority (highest first; ties keep AGENTS order)
+        responding_agents.sort(key=itemgetter(0), reverse=True)
 
         # If no specific agents matched, use General Assistant
         if not responding_agents:
-            responding_agents.append({
-                'name': 'General Assistant',
-                'priority': 1,
-                'color': AGENTS['General Assistant']['color']
-            })
+            responding_agents.append((1, 'General Assistant', AGENTS['General Assistant']['color']))
 
         return responding_agents
 
     def agent_response(self, agent_name, color, message_text):
         """Simulate agent response (replace with actual AI call)"""
-        responses = {
-            'Security Bot': f"🔒 Security analysis: Checking '{message_text}' for vulnerabilities...",
-            'System Bot': f"💻 System command recognized. Processing '{message_text}'...",
-            'C1 Mechanic': f"🔧 Build request received. Planning '{message_text}'...",
-            'C2 Architect': f"🏗️  Architecture analysis for '{message_text}'...",
-            'C3 Oracle': f"🔮 Pattern recognition active. Analyzing '{message_text}'...",
-            'Comms Bot': f"📡 Communications request. Processing '{message_text}'...",
-            'General Assistant': f"💬 I heard '{message_text}'. How can I help?"
-        }
-
-        response = responses.get(agent_name, f"Agent {agent_name} processing...")
-        print(f"{color}{response}\033[0m")  # Color + reset
+        template = RESPONSE_TEMPLATES.get(agent_name)
+        if template:
+            print(template.format(message_text))  # Color and reset already in the template
+        else:
+            print(f"{color}Agent {agent_name} processing...\033[0m")
 
     def process_queue(self):
-        """Process messages from the voice queue"""
-        while self.running:
+        """Process messages from the voice queue (until the stop sentinel)"""
+        stopping = False
+        while not stopping:
             try:
-                message = voice_queue.get(timeout=1)
+                # Block for one message, then take any burst queued behind it
+                batch = [self.voice_queue.get()]
+                while True:
+                    try:
+                        batch.append(self.voice_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if _SENTINEL in batch:  # Stop signal; finish what was queued first
+                    stopping = True
+                    batch = batch[:batch.index(_SENTINEL)]
 
-                # Route to appropriate agents
-                agents = self.route_to_agents(message)
+                # Route every message, then let all agents respond at once
+                futures = []
+                for message in batch:
+                    agents = self.route_to_agents(message)
 
-                print(f"📨 Routing to {len(agents)} agent(s):\n")
+                    print(f"📨 Routing to {len(agents)} agent(s):\n")
 
-                # Multiple agents can respond (talking over each other)
-                threads = []
-                for agent in agents:
-                    thread = threading.Thread(
-                        target=self.agent_response,
-                        args=(agent['name'], agent['color'], message['text'])
+                    # Multiple agents can respond (talking over each other)
+                    futures.extend(
+                        self.pool.submit(self.agent_response, name, color, message['text'])
+                        for _, name, color in agents
                     )
-                    thread.start()
-                    threads.append(thread)
 
                 # Wait for all agents to finish
-                for thread in threads:
-                    thread.join()
+                wait(futures)
 
-                print("\n" + "="*60 + "\n")
+                if batch:
+                    print("\n" + "="*60 + "\n")
 
-            except queue.Empty:
-                continue
             except KeyboardInterrupt:
                 self.running = False
                 break
 
+    def stop(self):
+        """Stop listening and tell the queue processor to finish up and exit"""
+        self.running = False
+        self.voice_queue.put(_SENTINEL)
+
     def run(self):
         """Start the voice routing system"""
         print("🌐 INTELLIGENT VOICE ROUTING SYSTEM")
@@ -191,8 +236,8 @@ class VoiceRouter:
         print("="*60 + "\n")
 
         # Start queue processor in background
-        processor_thread = threading.Thread(target=self.process_queue, daemon=True)
-        processor_thread.start()
+        self.processor_thread = threading.Thread(target=self.process_queue, daemon=True)
+        self.processor_thread.start()
 
         # Start listening (blocks until Ctrl+C)
         try:
@@ -200,6 +245,11 @@ class VoiceRouter:
         except KeyboardInterrupt:
             print("\n\n🛑 Stopping voice router...")
             self.running = False
+        finally:
+            # Let queued messages finish before the pool stops taking work
+            self.stop()
+            self.processor_thread.join()
+            self.pool.shutdown(wait=False)
 
 if __name__ == "__main__":
     router = VoiceRouter()
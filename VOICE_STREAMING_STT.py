@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+VOICE STREAMING STT
+Streams microphone audio to Google Cloud Speech while it is being recorded
+The transcript arrives right after you stop talking, instead of after
+recording the whole phrase and then uploading it
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+import speech_recognition as sr
+
+# Optional: Google Cloud streaming recognition (needs credentials)
+try:
+    from google.cloud import speech
+    from google.api_core.exceptions import GoogleAPIError
+except ImportError:
+    speech = None
+
+
+def _rms(chunk):
+    """Loudness of a 16-bit PCM chunk (same measure as Recognizer.energy_threshold)"""
+    samples = array('h', chunk)
+    if not samples:
+        return 0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class StreamingRecognizer:
+    """Google Cloud streaming speech recognition over an open microphone"""
+
+    def __init__(self, language_code="en-US"):
+        """Initialize the Speech client (raises if no credentials are configured)"""
+        self.client = speech.SpeechClient()
+        self.language_code = language_code
+
+    def recognize(self, source, timeout=None, phrase_time_limit=None, on_partial=None,
+                  energy_threshold=None):
+        """
+        Stream audio from an open microphone until a final transcript arrives
+
+        Args:
+            source: Entered sr.Microphone (audio is read from source.stream;
+                open_microphone() gives the recommended 16 kHz, 100 ms chunks)
+            timeout: Seconds to wait for speech to start (None = forever)
+            phrase_time_limit: Max seconds of speech to send
+            on_partial: Called with each interim transcript; a truthy return
+                ends the stream early and returns that transcript
+            energy_threshold: If set, audio is checked locally and nothing is
+                sent until it gets this loud (like Recognizer.listen), and
+                phrase_time_limit counts from that point
+
+        Returns:
+            Recognized text
+
+        Raises:
+            sr.WaitTimeoutError: No speech started within timeout
+            sr.UnknownValueError: Speech was heard but not recognized
+            sr.RequestError: The Speech API call failed
+        """
+        config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=source.SAMPLE_RATE,
+                language_code=self.language_code
+            ),
+            interim_results=True,
+            single_utterance=True
+        )
+
+        preroll = []
+        if energy_threshold is not None:
+            preroll = self._wait_for_speech(source, energy_threshold, timeout)
+
+        start = time.monotonic()
+        state = {"done": False, "speech_start": start if preroll else None}
+
+        # Set whenever the request generator is not reading the microphone
+        idle = threading.Event()
+        idle.set()
+
+        def audio_requests():
+            # Runs on the gRPC sender thread, feeding chunks as they are captured
+            try:
+                for chunk in preroll:
+                    yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+                while True:
+                    idle.clear()
+                    if state["done"]:
+                        break
+                    now = time.monotonic()
+                    if state["speech_start"] is None:
+                        if timeout is not None and now - start > timeout:
+                            break
+                    elif phrase_time_limit is not None and now - state["speech_start"] > phrase_time_limit:
+                        break
+                    chunk = source.stream.read(source.CHUNK)
+                    idle.set()
+                    yield speech.StreamingRecognizeRequest(audio_content=chunk)
+            finally:
+                idle.set()
+
+        responses = None
+        try:
+            responses = self.client.streaming_recognize(config, audio_requests())
+            for response in responses:
+                if response.speech_event_type == speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE:
+                    # Speaker stopped; stop sending audio and wait for the final result
+                    state["done"] = True
+
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    if state["speech_start"] is None:
+                        state["speech_start"] = time.monotonic()
+                    text = result.alternatives[0].transcript.strip()
+                    if result.is_final:
+                        if text:
+                            return text
+                    elif on_partial is not None and text and on_partial(text):
+                        return text
+        except GoogleAPIError as e:
+            raise sr.RequestError(f"Streaming recognition failed: {e}")
+        finally:
+            # Cancel the call and wait out any in-flight read, so the caller
+            # gets the microphone back with no other thread reading it
+            state["done"] = True
+            if responses is not None:
+                responses.cancel()
+            idle.wait()
+
+        if state["speech_start"] is None:
+            raise sr.WaitTimeoutError("No speech detected")
+        raise sr.UnknownValueError()
+
+    def _wait_for_speech(self, source, energy_threshold, timeout):
+        """
+        Read the microphone locally until it is loud enough to be speech
+
+        Returns:
+            The last ~0.3 s of chunks, so the start of the phrase isn't clipped
+
+        Raises:
+            sr.WaitTimeoutError: Nothing loud enough within timeout
+        """
+        preroll = deque(maxlen=max(1, round(0.3 * source.SAMPLE_RATE / source.CHUNK)))
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while deadline is None or time.monotonic() < deadline:
+            chunk = source.stream.read(source.CHUNK)
+            preroll.append(chunk)
+            if _rms(chunk) > energy_threshold:
+                return list(preroll)
+
+        raise sr.WaitTimeoutError("No speech detected")
+
+
+def open_microphone(device_index=None):
+    """
+    Open a microphone at 16 kHz in 100 ms chunks (what streaming recognition
+    and Vosk want), or at the device's native rate if its host API rejects
+    16 kHz (e.g. WASAPI)
+
+    Returns:
+        (microphone, source): the sr.Microphone and its entered source
+    """
+    microphone = sr.Microphone(device_index=device_index, sample_rate=16000, chunk_size=1600)
+    try:
+        return microphone, microphone.__enter__()
+    except OSError as e:
+        print(f"⚠️ Microphone can't record at 16 kHz, using its native rate: {e}")
+        microphone = sr.Microphone(device_index=device_index)
+        return microphone, microphone.__enter__()
+
+
+def create_streaming_recognizer(language_code="en-US"):
+    """Return a StreamingRecognizer, or None if streaming isn't available"""
+    if speech is None:
+        return None
+    try:
+        return StreamingRecognizer(language_code)
+    except Exception as e:
+        print(f"⚠️ Streaming speech recognition unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Test streaming recognition
+    print("🧪 Testing Streaming STT...")
+
+    recognizer = create_streaming_recognizer()
+    if recognizer is None:
+        print("❌ Install google-cloud-speech and set GOOGLE_APPLICATION_CREDENTIALS")
+    else:
+        microphone, source = open_microphone()
+        print("🎤 Listening... (speak now)")
+        try:
+            print(f"📝 You said: {recognizer.recognize(source, timeout=5, phrase_time_limit=15)}")
+        except sr.WaitTimeoutError:
+            print("⏱️ No speech detected")
+        except sr.UnknownValueError:
+            print("❓ Could not understand speech")
+        except sr.RequestError as e:
+            print(f"❌ Error: {e}")
+        finally:
+            microphone.__exit__(None, None, None)
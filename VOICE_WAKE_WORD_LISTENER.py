@@ -7,83 +7,173 @@ Runs in background, starts with Windows
 """
 
 import speech_recognition as sr
+import atexit
 import pyttsx3
+import json
+import queue
+import threading
 import time
 import sys
 import os
 from datetime import datetime
 from VOICE_ANALYTICS_LOGGER import init_analytics, get_analytics
+from VOICE_STREAMING_STT import create_streaming_recognizer, open_microphone
+
+# Optional: on-device wake word spotting (falls back to Google when missing)
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    SetLogLevel(-1)
+except ImportError:
+    Model = None
+
+# Shokz microphone index, looked up once per process (None = not found)
+_SHOKZ_MIC_INDEX = None
+_SHOKZ_MIC_SEARCHED = False
 
 class WakeWordListener:
     """Always-listening wake word detection"""
 
-    def __init__(self, wake_words=None, sensitivity=0.6):
+    def __init__(self, wake_words=None, sensitivity=0.6, wake_model_path=None):
         """
         Initialize wake word listener
 
         Args:
             wake_words: List of wake words (default: ["hey claude", "hey commander"])
             sensitivity: Detection sensitivity 0.0-1.0 (default 0.6)
+            wake_model_path: Vosk model directory for on-device wake word
+                spotting (default: $VOSK_MODEL_PATH, else the small English model)
         """
         self.wake_words = wake_words or ["hey claude", "hey commander", "claude", "commander"]
         self.sensitivity = sensitivity
         self.running = False
+        self._stop_event = threading.Event()
 
         # Initialize components
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = 4000  # Adjust for background noise
         self.recognizer.dynamic_energy_threshold = True
+        # End phrases after 0.4 s of silence instead of the default 0.8 s
+        self.recognizer.pause_threshold = 0.4
+        self.recognizer.non_speaking_duration = 0.3
+        self.recognizer.phrase_threshold = 0.2
 
         # Auto-detect Shokz headset microphone
         mic_index = self._find_shokz_microphone()
         if mic_index is not None:
-            self.microphone = sr.Microphone(device_index=mic_index)
             print(f"   Using Shokz microphone at index {mic_index}")
         else:
-            self.microphone = sr.Microphone()
             print(f"   Using default microphone")
 
-        # TTS for responses
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', 175)
-        self.tts_engine.setProperty('volume', 1.0)
+        # Open the stream once for the listener's lifetime (PortAudio streams
+        # aren't thread-safe, so every read goes through _mic_lock)
+        self.microphone, self._mic_source = open_microphone(mic_index)
+        self._mic_lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+        # Calibrate once; dynamic_energy_threshold tracks drift after that
+        self.recognizer.adjust_for_ambient_noise(self._mic_source, duration=1.0)
+
+        # On-device wake word model (recognizes only the wake words)
+        self.wake_model = None
+        if Model is not None:
+            try:
+                model_path = wake_model_path or os.environ.get("VOSK_MODEL_PATH")
+                self.wake_model = Model(model_path) if model_path else Model(lang="en-us")
+                self.wake_grammar = json.dumps(self.wake_words + ["[unk]"])
+                print("   Wake word detection: on-device (Vosk)")
+            except Exception as e:
+                print(f"⚠️ Vosk wake word model unavailable, using Google: {e}")
+                self.wake_model = None
+
+        # Streaming recognition for commands (None = record, then upload)
+        self.streaming = create_streaming_recognizer()
 
         # Analytics
         self.analytics = init_analytics("VOICE_LOGS")
 
+        # TTS for responses, spoken on a background thread
+        self._tts_queue = queue.Queue()
+        self._tts_thread = threading.Thread(target=self._tts_worker, daemon=True)
+        self._tts_thread.start()
+
         print("🎤 Wake Word Listener initialized")
         print(f"   Wake words: {', '.join(self.wake_words)}")
         print(f"   Sensitivity: {sensitivity}")
 
     def _find_shokz_microphone(self):
         """Find Shokz headset microphone index"""
+        global _SHOKZ_MIC_INDEX, _SHOKZ_MIC_SEARCHED
+        if _SHOKZ_MIC_SEARCHED:
+            return _SHOKZ_MIC_INDEX
+
         try:
-            mic_list = sr.Microphone.list_microphone_names()
-            for i, name in enumerate(mic_list):
+            fallback = None
+            for i, name in enumerate(sr.Microphone.list_microphone_names()):
                 # Look for Shokz headset microphone (not output)
                 name_lower = name.lower()
-                if 'shokz' in name_lower and ('headset' in name_lower or 'input' in name_lower):
-                    # Prefer "Headset" over "Output"
-                    if 'headset' in name_lower:
-                        return i
-            # Fallback: any Shokz input device
-            for i, name in enumerate(mic_list):
-                if 'shokz' in name.lower() and 'input' in name.lower():
-                    return i
-            return None
+                if 'shokz' not in name_lower:
+                    continue
+                # Prefer "Headset" over "Output"
+                if 'headset' in name_lower:
+                    fallback = i
+                    break
+                # Fallback: first Shokz input device
+                if fallback is None and 'input' in name_lower:
+                    fallback = i
+
+            _SHOKZ_MIC_INDEX = fallback
+            _SHOKZ_MIC_SEARCHED = True
+            return fallback
         except Exception as e:
             print(f"⚠️ Error finding Shokz mic: {e}")
             return None
 
     def speak(self, text):
-        """Speak text"""
+        """Queue text to be spoken (returns immediately)"""
+        self.analytics.log_tts(text, success=True)
+        self._tts_queue.put(text)
+
+    def _tts_worker(self):
+        """Speak queued text; the engine is created and used only on this thread"""
         try:
-            self.analytics.log_tts(text, success=True)
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+            engine = pyttsx3.init()
+            engine.setProperty('rate', 175)
+            engine.setProperty('volume', 1.0)
         except Exception as e:
             print(f"❌ TTS Error: {e}")
             self.analytics.log_error("tts", str(e))
+            engine = None
+
+        while True:
+            text = self._tts_queue.get()
+            try:
+                if text is None:
+                    return
+                if engine is not None:
+                    engine.say(text)
+                    engine.runAndWait()
+            except Exception as e:
+                print(f"❌ TTS Error: {e}")
+                self.analytics.log_error("tts", str(e))
+            finally:
+                self._tts_queue.task_done()
+
+    def _wait_for_speech(self):
+        """Block until queued speech has finished, so we don't hear ourselves"""
+        self._tts_queue.join()
+
+        # The stream stays open while we talk; drop what it buffered meanwhile
+        stream = self._mic_source.stream.pyaudio_stream
+        available = stream.get_read_available()
+        if available:
+            stream.read(available, exception_on_overflow=False)
+
+    def shutdown(self):
+        """Close the microphone stream"""
+        with self._mic_lock:
+            if self._mic_source is not None:
+                self._mic_source = None
+                self.microphone.__exit__(None, None, None)
 
     def listen_for_wake_word(self, timeout=None):
         """
@@ -96,24 +186,24 @@ class WakeWordListener:
             True if wake word detected, False if timeout
         """
         try:
-            with self.microphone as source:
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            if self.wake_model is not None:
+                return self._listen_for_wake_word_local(timeout)
+
+            with self._mic_lock:
+                self._wait_for_speech()
+                if self.streaming:
+                    # Streams only once someone speaks, and stops as soon as an
+                    # interim result contains a wake word
+                    text = self.streaming.recognize(self._mic_source, timeout=timeout, phrase_time_limit=5,
+                                                    on_partial=self._find_wake_word,
+                                                    energy_threshold=self.recognizer.energy_threshold).lower()
+                else:
+                    audio = self.recognizer.listen(self._mic_source, timeout=timeout, phrase_time_limit=5)
+                    text = self.recognizer.recognize_google(audio).lower()
 
-                # Listen
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=5)
-
-            # Recognize speech
-            text = self.recognizer.recognize_google(audio).lower()
             self.analytics.log_stt(text, success=True)
 
-            # Check for wake word
-            for wake_word in self.wake_words:
-                if wake_word in text:
-                    print(f"✅ Wake word detected: '{wake_word}' in '{text}'")
-                    return True
-
-            return False
+            return self._check_wake_word(text)
 
         except sr.WaitTimeoutError:
             return False
@@ -128,14 +218,69 @@ class WakeWordListener:
             self.analytics.log_error("listener", str(e))
             return False
 
+    def _listen_for_wake_word_local(self, timeout=None):
+        """Stream microphone audio into Vosk until a wake word is heard"""
+        with self._mic_lock:
+            self._wait_for_speech()
+            deadline = None if timeout is None else time.monotonic() + timeout
+
+            source = self._mic_source
+            recognizer = KaldiRecognizer(self.wake_model, source.SAMPLE_RATE, self.wake_grammar)
+
+            last_partial = ""
+            while not self._stop_event.is_set() and (deadline is None or time.monotonic() < deadline):
+                if recognizer.AcceptWaveform(source.stream.read(source.CHUNK)):
+                    last_partial = ""
+                    words = json.loads(recognizer.Result()).get("text", "").split()
+                else:
+                    # Check the rolling hypothesis so detection fires mid-utterance
+                    partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                    if partial == last_partial:
+                        continue
+                    last_partial = partial
+                    words = partial.split()
+                    if not self._find_wake_word(partial):
+                        continue
+
+                text = " ".join(word for word in words if word != "[unk]")
+                if not text:
+                    continue
+
+                self.analytics.log_stt(text, success=True)
+                if self._check_wake_word(text):
+                    return True
+
+        return False
+
+    def _find_wake_word(self, text):
+        """Return the first wake word contained in text, or None"""
+        text = text.lower()
+        for wake_word in self.wake_words:
+            if wake_word in text:
+                return wake_word
+        return None
+
+    def _check_wake_word(self, text):
+        """Return True if text contains one of the wake words"""
+        wake_word = self._find_wake_word(text)
+        if wake_word is None:
+            return False
+        print(f"✅ Wake word detected: '{wake_word}' in '{text}'")
+        return True
+
     def listen_for_command(self, timeout=5):
         """Listen for command after wake word"""
         try:
-            print("🎤 Listening for command...")
-            with self.microphone as source:
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
+            with self._mic_lock:
+                self._wait_for_speech()
+                print("🎤 Listening for command...")
+                if self.streaming:
+                    text = self.streaming.recognize(self._mic_source, timeout=timeout, phrase_time_limit=10,
+                                                    energy_threshold=self.recognizer.energy_threshold)
+                else:
+                    audio = self.recognizer.listen(self._mic_source, timeout=timeout, phrase_time_limit=10)
+                    text = self.recognizer.recognize_google(audio)
 
-            text = self.recognizer.recognize_google(audio)
             print(f"📝 Command: {text}")
             self.analytics.log_stt(text, success=True)
             return text
@@ -189,15 +334,21 @@ class WakeWordListener:
         else:
             return f"Command received: {command}. I'm still learning new commands. Try asking about status, deploy, payment, cloud, or cockpit."
 
+    def stop(self):
+        """Stop continuous listening (safe to call from another thread)"""
+        self.running = False
+        self._stop_event.set()
+
     def run_continuous(self):
         """Run continuous listening mode"""
         self.running = True
+        self._stop_event.clear()
         self.analytics.log_system_event("listener_started", {"wake_words": self.wake_words})
 
         print("\n" + "=" * 60)
         print("🎤 WAKE WORD LISTENER ACTIVE")
         print("=" * 60)
-        print(f"Say: {' or '.join([f'\"{w}\"' for w in self.wake_words])}")
+        print("Say: " + " or ".join(f'"{w}"' for w in self.wake_words))
         print("Then ask your question or give a command")
         print("Say 'stop listening' to exit")
         print("=" * 60 + "\n")
@@ -226,7 +377,7 @@ class WakeWordListener:
                         # Check for stop command
                         if response == "STOP_LISTENING":
                             self.speak("Stopping listener. Goodbye Commander!")
-                            self.running = False
+                            self.stop()
                             break
 
                         # Speak response
@@ -235,24 +386,24 @@ class WakeWordListener:
                     else:
                         self.speak("I didn't hear a command. Try again.")
 
-                # Brief pause between wake word checks
-                time.sleep(0.1)
-
             except KeyboardInterrupt:
                 print("\n⚠️ Interrupted by user")
-                self.running = False
+                self.stop()
                 break
 
             except Exception as e:
                 print(f"❌ Error in main loop: {e}")
                 self.analytics.log_error("main_loop", str(e))
-                time.sleep(1)  # Prevent rapid error loops
+                self._stop_event.wait(1)  # Prevent rapid error loops
 
-        # Cleanup
+        # Cleanup (let the goodbye finish speaking)
+        self._tts_queue.put(None)
+        self._tts_thread.join()
         self.analytics.log_system_event("listener_stopped", {
             "wake_detected_count": wake_detected_count
         })
         self.analytics.close_session()
+        self.shutdown()
         print("✅ Wake word listener stopped")
 
 